@@ -1,11 +1,16 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 import logging
 import sys
 import os
 
 from src.core.config import settings
 from src.api.routes import router
+from src.services.ocr_services import ocr_service
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,38 +18,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Actions to perform on application startup and shutdown"""
+    logger.info(f"Starting {settings.APP_NAME} v{settings.VERSION}")
+    # Load the OCR model in the background so the server accepts requests
+    # (and /health reports "loading") while weights download
+    ocr_service.warmup()
+    yield
+    logger.info(f"Shutting down {settings.APP_NAME}")
+
 app = FastAPI(
         title=settings.APP_NAME,
         version=settings.VERSION,
+        default_response_class=ORJSONResponse,
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        lifespan=lifespan
     )
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
 )
 
-app.include_router(router, prefix=settings.API_V1_STR)
+# Compress text-heavy OCR responses; small payloads like /health stay as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
-@app.on_event("startup")
-async def startup_event():
-    """Actions to perform on application startup"""
-    logger.info(f"Starting {settings.APP_NAME} v{settings.VERSION}")
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Actions to perform on application shutdown"""
-    logger.info(f"Shutting down {settings.APP_NAME}")
+class RequestSizeLimitMiddleware:
+    """Refuse oversized uploads from Content-Length before the body is spooled"""
+    
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name != b"content-length":
+                    continue
+                if value.isdigit() and int(value) > self.max_size:
+                    response = ORJSONResponse(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        content={"detail": f"File size too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB}MB"}
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+        await self.app(scope, receive, send)
+
+# Added last so it runs outermost, before any other middleware touches the body
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_size=settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD
+)
+
+app.include_router(router, prefix=settings.API_V1_STR)
 
 if __name__ == "__main__":
+    # Run a single worker: the EasyOCR model is loaded once per process in the
+    # background at startup and shared by the OCR thread pool
+    # (OCR_CONCURRENCY), so forking more
+    # workers only duplicates the model in memory. See README.md for scaling
+    # CPU inference across processes.
     import uvicorn
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
+        workers=1,
+        # "auto" picks uvloop/httptools (from uvicorn[standard]) where available
+        loop="auto",
+        http="auto",
         reload=settings.RELOAD
     )
\ No newline at end of file
@@ -1,17 +1,22 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any
 
-from ..core.security import validate_image_content_type, validate_file_size
-from ..services.ocr_services import ocr_service
+from ..core.config import settings
+from ..core.security import detect_image_format
+from ..services.ocr_services import ocr_service, InvalidImageError
 from ..models.schemas import HealthCheck, OCRResponse, ErrorResponse
 
 router = APIRouter()
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+HEADER_SIZE = 1024
+
 @router.get("/health", response_model=HealthCheck)
 async def health_check() -> HealthCheck:
     """Health check endpoint"""
     return HealthCheck(
-        status="healthy" if ocr_service.is_healthy() else "unhealthy",
+        status=ocr_service.get_status(),
         ocr_engine="EasyOCR",
         version="1.0.0"
     )
@@ -25,14 +30,15 @@ async def health_check() -> HealthCheck:
         500: {"model": ErrorResponse}
     }
 )
-async def predict(image: UploadFile = File(...)) -> OCRResponse:
+async def predict(image: UploadFile = File(...)) -> ORJSONResponse:
     """
     Process image and extract text using OCR
     
     - **image**: Image file (PNG, JPG, JPEG)
     """
-    # Validate file type
-    if not validate_image_content_type(image.content_type): # type: ignore
+    # Validate file type from the magic bytes rather than the client's content type
+    header = await image.read(HEADER_SIZE)
+    if detect_image_format(header) is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File must be a supported image type (PNG, JPG, JPEG)"
@@ -46,28 +52,29 @@ async def predict(image: UploadFile = File(...)) -> OCRResponse:
         )
     
     try:
-        # Read image contents
-        contents = await image.read()
-        
-        # Validate file size (max 10MB)
-        if not validate_file_size(contents, max_size_mb=10):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File size too large. Maximum size is 10MB"
-            )
-        
-        # Validate image
-        if not ocr_service.validate_image(contents):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid image file"
-            )
+        # Copy the spooled upload into one buffer, enforcing the exact file size
+        # limit (oversized request bodies are already refused in main.py)
+        max_size = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        buffer = bytearray(header)
+        while chunk := await image.read(UPLOAD_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) > max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File size too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB}MB"
+                )
         
-        # Process image and extract text
-        result = ocr_service.process_image(contents)
+        # Process image and extract text; decoding doubles as validation
+        result = await ocr_service.process_image(buffer)
         
-        return OCRResponse(**result)
+        # The service already returns the OCRResponse shape, skip re-validating it
+        return ORJSONResponse(content=result)
         
+    except InvalidImageError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -81,7 +88,7 @@ async def root() -> Dict[str, Any]:
     """Root endpoint"""
     return {
         "message": "OCR API is running",
-        "status": "healthy" if ocr_service.is_healthy() else "unhealthy",
+        "status": ocr_service.get_status(),
         "version": "1.0.0",
         "docs": "/docs"
     }
\ No newline at end of file
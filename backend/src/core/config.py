@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,16 +9,29 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     
     # CORS
-    ALLOWED_ORIGINS: list = ["*"]
+    ALLOWED_ORIGINS: list = ["http://localhost:8501", "http://127.0.0.1:8501"]
     
     # OCR Settings
     OCR_LANGUAGES: list = ["en"]
     OCR_GPU: bool = False
+    OCR_CONCURRENCY: int = os.cpu_count() or 1
+    OCR_MAX_BATCH: int = 16
+    OCR_MAX_WAIT_MS: int = 20
+    OCR_CACHE_SIZE: int = 512
+    OCR_PREPROCESS: bool = False
+    OCR_MAX_SIDE: int = 1600
+    OCR_TRT_DETECTOR_ENGINE: Optional[str] = None
+    OCR_TRT_RECOGNIZER_ENGINE: Optional[str] = None
+    OCR_ONNX_RECOGNIZER: Optional[str] = None
     
     # API Settings
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     RELOAD: bool = False
+    MAX_UPLOAD_SIZE_MB: int = 10
+    # Same decompression-bomb limit Pillow warns at; small files can still
+    # declare huge dimensions, so this is checked before decoding
+    MAX_IMAGE_PIXELS: int = 89_478_485
     
     class Config:
         case_sensitive = True
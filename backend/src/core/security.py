@@ -1,12 +1,51 @@
-from fastapi import HTTPException, status
-from typing import List
-
-def validate_image_content_type(content_type: str) -> bool:
-    """Validate if the file is a supported image type"""
-    supported_types = ["image/png", "image/jpeg", "image/jpg"]
-    return content_type in supported_types
-
-def validate_file_size(content: bytes, max_size_mb: int = 10) -> bool:
-    """Validate file size"""
-    max_size = max_size_mb * 1024 * 1024  # Convert to bytes
-    return len(content) <= max_size
\ No newline at end of file
+from typing import Optional, Tuple, Union
+
+JPEG_MAGIC = b"\xff\xd8\xff"
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+# JPEG start-of-frame markers, which carry the image dimensions
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def detect_image_format(header: bytes) -> Optional[str]:
+    """Identify a supported image type (PNG, JPEG) from its leading magic bytes"""
+    if header[:3] == JPEG_MAGIC:
+        return "JPEG"
+    if header[:8] == PNG_MAGIC:
+        return "PNG"
+    return None
+
+def read_image_dimensions(contents: Union[bytes, bytearray]) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a PNG IHDR chunk or JPEG SOF segment without decoding"""
+    image_format = detect_image_format(contents)
+    
+    if image_format == "PNG":
+        if contents[12:16] != b"IHDR" or len(contents) < 24:
+            return None
+        return int.from_bytes(contents[16:20], "big"), int.from_bytes(contents[20:24], "big")
+    
+    if image_format == "JPEG":
+        offset = 2
+        while offset + 4 <= len(contents):
+            if contents[offset] != 0xFF:
+                return None
+            marker = contents[offset + 1]
+            if marker == 0xFF:
+                # Fill byte before the real marker
+                offset += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                # Standalone markers carry no length
+                offset += 2
+                continue
+            length = int.from_bytes(contents[offset + 2:offset + 4], "big")
+            if length < 2:
+                return None
+            if marker in JPEG_SOF_MARKERS:
+                if offset + 9 > len(contents):
+                    return None
+                height = int.from_bytes(contents[offset + 5:offset + 7], "big")
+                width = int.from_bytes(contents[offset + 7:offset + 9], "big")
+                return width, height
+            offset += 2 + length
+    
+    return None
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, TypedDict
 
 class HealthCheck(BaseModel):
     status: Optional[str] = None
@@ -19,6 +19,16 @@ class OCRResponse(BaseModel):
     image_format: Optional[str] = None
     image_size: Optional[str] = None
 
+class OCRResult(TypedDict):
+    """Plain-dict mirror of OCRResponse returned by the OCR service; all keys are always set"""
+    success: bool
+    text: str
+    confidence: Optional[float]
+    word_count: Optional[int]
+    error: Optional[str]
+    image_format: Optional[str]
+    image_size: Optional[str]
+
 class ErrorResponse(BaseModel):
     detail: str
     error_code: Optional[str] = None
\ No newline at end of file
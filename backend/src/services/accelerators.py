@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+import torch
+
+class TRTModule:
+    """
+    Drop-in replacement for an EasyOCR torch module backed by a serialized
+    TensorRT engine. Inputs and outputs stay as CUDA tensors so EasyOCR's
+    own pre/post-processing (cropping, CTC decoding) is reused unchanged.
+    """
+    
+    def __init__(self, engine_path: str):
+        import tensorrt as trt
+        
+        trt_logger = trt.Logger(trt.Logger.WARNING)
+        with open(engine_path, "rb") as f, trt.Runtime(trt_logger) as runtime:
+            self.engine = runtime.deserialize_cuda_engine(f.read())
+        if self.engine is None:
+            raise RuntimeError(f"Failed to deserialize TensorRT engine {engine_path}")
+        
+        self.context = self.engine.create_execution_context()
+        names = [self.engine.get_tensor_name(i) for i in range(self.engine.num_io_tensors)]
+        self.input_names = [
+            n for n in names if self.engine.get_tensor_mode(n) == trt.TensorIOMode.INPUT
+        ]
+        self.output_names = [
+            n for n in names if self.engine.get_tensor_mode(n) == trt.TensorIOMode.OUTPUT
+        ]
+        self._dtypes = {
+            n: torch.float16 if self.engine.get_tensor_dtype(n) == trt.float16 else torch.float32
+            for n in names
+        }
+        # An execution context must not be shared between concurrent calls
+        self._lock = threading.Lock()
+    
+    def eval(self) -> "TRTModule":
+        """EasyOCR puts the recognizer in eval mode before each call"""
+        return self
+    
+    def __call__(self, *inputs):
+        # Extra positional args (e.g. the recognizer's unused text tensor) are ignored
+        with self._lock:
+            stream = torch.cuda.current_stream()
+            # Keep converted inputs alive until the engine has consumed them
+            bound = []
+            for name, tensor in zip(self.input_names, inputs):
+                tensor = tensor.to(device="cuda", dtype=self._dtypes[name]).contiguous()
+                self.context.set_input_shape(name, tuple(tensor.shape))
+                self.context.set_tensor_address(name, tensor.data_ptr())
+                bound.append(tensor)
+            
+            outputs = []
+            for name in self.output_names:
+                shape = tuple(self.context.get_tensor_shape(name))
+                output = torch.empty(shape, dtype=self._dtypes[name], device="cuda")
+                self.context.set_tensor_address(name, output.data_ptr())
+                outputs.append(output)
+            
+            self.context.execute_async_v3(stream.cuda_stream)
+            stream.synchronize()
+        
+        outputs = [output.float() for output in outputs]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+class ORTModule:
+    """
+    Drop-in replacement for an EasyOCR torch module backed by an ONNX Runtime
+    CPU session, typically running an INT8-quantized model.
+    """
+    
+    def __init__(self, model_path: str, num_threads: int):
+        import onnxruntime as ort
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+    
+    def eval(self) -> "ORTModule":
+        """EasyOCR puts the recognizer in eval mode before each call"""
+        return self
+    
+    def __call__(self, *inputs):
+        # Extra positional args (e.g. the recognizer's unused text tensor) are ignored
+        feeds = {
+            name: tensor.detach().cpu().numpy().astype(np.float32, copy=False)
+            for name, tensor in zip(self.input_names, inputs)
+        }
+        outputs = [torch.from_numpy(output) for output in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
@@ -1,25 +1,78 @@
-import io
+import os
+import asyncio
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional, Tuple, Union
 import numpy as np
 import cv2
-from PIL import Image
 import easyocr
+import torch
+from blake3 import blake3
 
 from ..core.config import settings
+from ..core.security import detect_image_format, read_image_dimensions
+from ..models.schemas import OCRResult
 from ..utils.image_processor import ImageProcessor
+from .accelerators import ORTModule, TRTModule
 
 logger = logging.getLogger(__name__)
 
+class InvalidImageError(ValueError):
+    """Raised when an upload cannot be decoded as an image"""
+
+def _error_result(message: str) -> OCRResult:
+    """Build a failed OCR result with every response field present"""
+    return {
+        "success": False,
+        "text": "",
+        "confidence": None,
+        "word_count": None,
+        "error": message,
+        "image_format": None,
+        "image_size": None
+    }
+
+def _content_key(contents: Union[bytes, bytearray]) -> bytes:
+    """Hash an upload for the result cache"""
+    return blake3(contents).digest()
+
+def _threads_per_worker() -> int:
+    """Share the CPU cores evenly between the OCR worker threads"""
+    return max(1, (os.cpu_count() or 1) // settings.OCR_CONCURRENCY)
+
 class OCRService:
     """Service layer for OCR operations"""
     
     def __init__(self):
         self.reader = None
         self.image_processor = ImageProcessor()
-        self._initialize_ocr()
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.OCR_CONCURRENCY,
+            thread_name_prefix="ocr-worker"
+        )
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._batcher_task = None
+        # Only touched from the event loop, so no lock is needed
+        self._cache: "OrderedDict[bytes, OCRResult]" = OrderedDict()
+        # The reader is loaded in the background at startup (see warmup), or
+        # by the first request if that comes first
+        self._reader_lock = asyncio.Lock()
+        self._reader_loaded = False
+        self._warmup_task = None
     
     def _initialize_ocr(self) -> None:
         """Initialize EasyOCR reader"""
+        # The OCR worker pool runs several calls at once; give each its share
+        # of the cores so intra-op threads don't oversubscribe them
+        torch.set_num_threads(_threads_per_worker())
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only allowed before any inter-op work has started
+            pass
+        
         try:
             self.reader = easyocr.Reader(
                 settings.OCR_LANGUAGES,
@@ -29,110 +82,262 @@ class OCRService:
         except Exception as e:
             logger.error(f"Failed to initialize EasyOCR: {e}")
             self.reader = None
+            return
+        
+        if settings.OCR_GPU:
+            self._load_trt_engines()
+        else:
+            self._load_onnx_recognizer()
     
-    def is_healthy(self) -> bool:
-        """Check if OCR service is healthy"""
-        return self.reader is not None
+    def _load_trt_engines(self) -> None:
+        """Swap EasyOCR's PyTorch models for TensorRT engines when they exist"""
+        engines = {
+            "detector": settings.OCR_TRT_DETECTOR_ENGINE,
+            "recognizer": settings.OCR_TRT_RECOGNIZER_ENGINE
+        }
+        for attr, engine_path in engines.items():
+            if not engine_path or not os.path.isfile(engine_path):
+                continue
+            try:
+                setattr(self.reader, attr, TRTModule(engine_path))
+                logger.info(f"Using TensorRT engine for {attr}: {engine_path}")
+            except Exception as e:
+                logger.warning(f"Falling back to PyTorch {attr}: {e}")
     
-    def validate_image(self, contents: bytes) -> bool:
-        """Validate if the uploaded file is a valid image"""
+    def _load_onnx_recognizer(self) -> None:
+        """Swap EasyOCR's CPU recognizer for an INT8 ONNX Runtime session when configured"""
+        model_path = settings.OCR_ONNX_RECOGNIZER
+        if not model_path or not os.path.isfile(model_path):
+            return
         try:
-            image = Image.open(io.BytesIO(contents))
-            image.verify()
-            return True
+            self.reader.recognizer = ORTModule(model_path, _threads_per_worker())
+            logger.info(f"Using ONNX Runtime recognizer: {model_path}")
+        except ImportError:
+            logger.warning("onnxruntime is not installed, falling back to PyTorch recognizer")
         except Exception as e:
-            logger.warning(f"Image validation failed: {e}")
-            return False
+            logger.warning(f"Falling back to PyTorch recognizer: {e}")
+    
+    async def _ensure_reader(self) -> None:
+        """Load the EasyOCR reader once, off the event loop"""
+        if self._reader_loaded:
+            return
+        async with self._reader_lock:
+            if self._reader_loaded:
+                return
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self._executor, self._initialize_ocr)
+            finally:
+                # Even a crashed load counts as finished, so status turns unhealthy
+                self._reader_loaded = True
+    
+    def warmup(self) -> None:
+        """Start loading the EasyOCR reader in the background"""
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.get_running_loop().create_task(
+                self._ensure_reader()
+            )
+            self._warmup_task.add_done_callback(self._log_warmup_failure)
+    
+    @staticmethod
+    def _log_warmup_failure(task: asyncio.Task) -> None:
+        """Surface errors from the background reader load"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to load EasyOCR in the background: {task.exception()}")
+    
+    def is_healthy(self) -> bool:
+        """Check if OCR service is healthy (the reader has not failed to load)"""
+        return self.reader is not None or not self._reader_loaded
+    
+    def get_status(self) -> str:
+        """Report the reader state: loading, healthy or unhealthy"""
+        if not self._reader_loaded:
+            return "loading"
+        return "healthy" if self.reader is not None else "unhealthy"
     
-    def process_image(self, contents: bytes) -> dict:
+    async def process_image(self, contents: Union[bytes, bytearray]) -> OCRResult:
         """
-        Process image and extract text
+        Process image and extract text without blocking the event loop
         """
-        if not self.is_healthy():
-            return {
-                "success": False,
-                "text": "",
-                "error": "OCR engine not available"
-            }
+        await self._ensure_reader()
+        if self.reader is None:
+            return _error_result("OCR engine not available")
         
+        # Identical uploads are served from the result cache. Hashing up to
+        # MAX_UPLOAD_SIZE_MB runs on the default executor, so cache hits never
+        # queue behind OCR jobs on our own pool
+        key = None
+        if settings.OCR_CACHE_SIZE > 0:
+            key = await asyncio.to_thread(_content_key, contents)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+        
+        loop = asyncio.get_running_loop()
         try:
-            # Convert to PIL Image
-            pil_image = Image.open(io.BytesIO(contents))
-            
-            # Store image metadata
-            image_format = pil_image.format
-            image_size = f"{pil_image.size[0]}x{pil_image.size[1]}"
-            
-            # Convert to RGB if necessary
-            if pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # Convert to numpy array
-            image_np = np.array(pil_image)
-            
-            # Preprocess image
-            processed_image = self.image_processor.preprocess(image_np)
+            # Decode and preprocess on the worker pool
+            processed_image, metadata = await loop.run_in_executor(
+                self._executor, self._prepare_image, contents
+            )
             
             # Extract text
-            result = self._extract_text(processed_image)
+            result = await self._extract_text(processed_image)
             
             # Add image metadata to response
-            result.update({
-                "image_format": image_format,
-                "image_size": image_size
-            })
+            result.update(metadata)
             
-            return result
+            if result["success"] and key is not None:
+                self._cache_put(key, result)
             
+            return result
+        
+        except InvalidImageError:
+            raise
         except Exception as e:
             logger.error(f"Image processing failed: {e}")
-            return {
-                "success": False,
-                "text": "",
-                "error": f"Image processing failed: {str(e)}"
-            }
-    
-    def _extract_text(self, image: np.ndarray) -> dict:
-        """Extract text from image using EasyOCR"""
+            return _error_result(f"Image processing failed: {str(e)}")
+    
+    def _cache_get(self, key: bytes) -> Optional[OCRResult]:
+        """Return a cached result and mark it as recently used"""
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+        return result
+    
+    def _cache_put(self, key: bytes, result: OCRResult) -> None:
+        """Store a result, evicting the least recently used entry when full"""
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        if len(self._cache) > settings.OCR_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    def _prepare_image(self, contents: Union[bytes, bytearray]) -> Tuple[np.ndarray, dict]:
+        """Decode and preprocess an uploaded image, returning it with its metadata"""
+        # Check the declared size first so decompression bombs are never decoded
+        dimensions = read_image_dimensions(contents)
+        if dimensions is None:
+            raise InvalidImageError("Invalid image file")
+        if dimensions[0] * dimensions[1] > settings.MAX_IMAGE_PIXELS:
+            raise InvalidImageError(
+                f"Image too large. Maximum is {settings.MAX_IMAGE_PIXELS} pixels"
+            )
+        
+        # Decode straight to BGR, the layout EasyOCR expects
+        image_bgr = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+        if image_bgr is None:
+            raise InvalidImageError("Invalid image file")
+        
+        # Store image metadata
+        height, width = image_bgr.shape[:2]
+        metadata = {
+            "image_format": detect_image_format(contents),
+            "image_size": f"{width}x{height}"
+        }
+        
+        # Cap the resolution fed to the detector
+        image_bgr = self.image_processor.downscale(image_bgr, settings.OCR_MAX_SIDE)
+        
+        # Preprocess image; EasyOCR converts to grayscale itself otherwise
+        if settings.OCR_PREPROCESS:
+            image_bgr = self.image_processor.preprocess(image_bgr)
+        
+        return image_bgr, metadata
+    
+    async def _extract_text(self, image: np.ndarray) -> OCRResult:
+        """Extract text from image by queueing it for the next EasyOCR batch"""
+        self._ensure_batcher()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        
         try:
-            # Convert image to BGR format for EasyOCR
-            if len(image.shape) == 3:
-                image_bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-            else:
-                image_bgr = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
-            
-            # Perform OCR
-            results = self.reader.readtext(image_bgr)
-            
-            # Extract text and confidence scores
-            extracted_text = []
-            confidences = []
-            
-            for (bbox, text, confidence) in results:
-                extracted_text.append(text)
-                confidences.append(confidence)
-            
-            # Combine all text
-            full_text = " ".join(extracted_text)
+            results = await future
+        except Exception as e:
+            logger.error(f"OCR extraction failed: {e}")
+            return _error_result(f"OCR processing failed: {str(e)}")
+        
+        # Extract text and confidence scores as parallel arrays
+        texts = [result[1] for result in results]
+        confidences = np.fromiter(
+            (result[2] for result in results), dtype=np.float32, count=len(results)
+        )
+        
+        # Combine all text
+        full_text = " ".join(texts)
+        
+        # Calculate average confidence
+        avg_confidence = float(confidences.mean()) if confidences.size else 0.0
+        
+        return {
+            "success": True,
+            "text": full_text.strip(),
+            "confidence": round(avg_confidence, 3),
+            "word_count": len(texts),
+            "error": None,
+            "image_format": None,
+            "image_size": None
+        }
+    
+    def _ensure_batcher(self) -> None:
+        """Start the batching loop on the running event loop if needed"""
+        if self._batcher_task is None or self._batcher_task.done():
+            self._batcher_task = asyncio.get_running_loop().create_task(
+                self._batcher_loop()
+            )
+    
+    async def _batcher_loop(self) -> None:
+        """
+        Collect queued images into batches of up to OCR_MAX_BATCH (GPU only),
+        waiting at most OCR_MAX_WAIT_MS after the first one, and dispatch them
+        to the pool
+        """
+        loop = asyncio.get_running_loop()
+        max_wait = settings.OCR_MAX_WAIT_MS / 1000
+        # Batching only pays off on GPU; on CPU a batch would run on a single
+        # pool thread, so keep one image per job and let the pool parallelize
+        max_batch = settings.OCR_MAX_BATCH if settings.OCR_GPU else 1
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + max_wait
             
-            # Calculate average confidence
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+            while len(batch) < max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             
-            return {
-                "success": True,
-                "text": full_text.strip(),
-                "confidence": round(avg_confidence, 3),
-                "word_count": len(extracted_text),
-                "error": None
-            }
+            # EasyOCR can only batch detection over images of the same shape
+            buckets = {}
+            for image, future in batch:
+                images, futures = buckets.setdefault(image.shape, ([], []))
+                images.append(image)
+                futures.append(future)
             
-        except Exception as e:
-            logger.error(f"OCR extraction failed: {e}")
-            return {
-                "success": False,
-                "text": "",
-                "error": f"OCR processing failed: {str(e)}"
-            }
+            for images, futures in buckets.values():
+                job = loop.run_in_executor(self._executor, self._readtext_batch, images)
+                job.add_done_callback(partial(self._resolve_batch, futures))
+    
+    def _readtext_batch(self, images: List[np.ndarray]) -> List[list]:
+        """Run EasyOCR once over a bucket of same-shaped images"""
+        with torch.inference_mode():
+            if len(images) == 1:
+                return [self.reader.readtext(images[0], batch_size=settings.OCR_MAX_BATCH)]
+            return self.reader.readtext_batched(images, batch_size=settings.OCR_MAX_BATCH)
+    
+    @staticmethod
+    def _resolve_batch(futures: List[asyncio.Future], job: asyncio.Future) -> None:
+        """Hand each request its slice of a finished batch"""
+        error = job.exception()
+        for index, future in enumerate(futures):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(job.result()[index])
 
 
-ocr_service = OCRService()
\ No newline at end of file
+ocr_service = OCRService()
@@ -0,0 +1,18 @@
+import numpy as np
+
+from src.utils.image_processor import ImageProcessor
+
+
+def test_downscale_caps_the_longest_side():
+    image = np.zeros((3000, 4000, 3), np.uint8)
+    assert ImageProcessor().downscale(image, 1600).shape == (1200, 1600, 3)
+
+
+def test_downscale_keeps_very_thin_images_at_least_one_pixel_wide():
+    image = np.zeros((2000, 1, 3), np.uint8)
+    assert ImageProcessor().downscale(image, 1600).shape == (1600, 1, 3)
+
+
+def test_downscale_leaves_small_images_untouched():
+    image = np.zeros((100, 200), np.uint8)
+    assert ImageProcessor().downscale(image, 1600) is image
@@ -0,0 +1,117 @@
+import asyncio
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.services.ocr_services import InvalidImageError, OCRService
+
+
+class StubReader:
+    """Stands in for easyocr.Reader; any batch containing a zero image fails"""
+    
+    def __init__(self):
+        self.batch_sizes = []
+    
+    def readtext(self, image, batch_size):
+        return self.readtext_batched([image], batch_size)[0]
+    
+    def readtext_batched(self, images, batch_size):
+        self.batch_sizes.append(len(images))
+        if any(int(image[0, 0]) == 0 for image in images):
+            raise RuntimeError("boom")
+        return [[(None, f"text{int(image[0, 0])}", 0.5)] for image in images]
+
+
+def run_with_stub(coroutine_factory):
+    """Run a coroutine against a fresh service whose reader is stubbed out"""
+    service = OCRService()
+    service.reader = StubReader()
+    try:
+        return service, asyncio.run(coroutine_factory(service))
+    finally:
+        service._executor.shutdown()
+
+
+def extract_all(images):
+    async def run(service):
+        return await asyncio.gather(*(service._extract_text(image) for image in images))
+    return run
+
+
+def test_batches_are_bucketed_by_shape_and_resolved_per_request(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_GPU", True)
+    images = [
+        np.full((2, 2), 1, np.uint8),
+        np.full((3, 3), 0, np.uint8),
+        np.full((2, 2), 2, np.uint8),
+        np.full((3, 3), 0, np.uint8),
+    ]
+    
+    service, results = run_with_stub(extract_all(images))
+    
+    # One job per shape; the failing bucket doesn't affect the other one
+    assert sorted(service.reader.batch_sizes) == [2, 2]
+    assert [r["success"] for r in results] == [True, False, True, False]
+    assert [r["text"] for r in results] == ["text1", "", "text2", ""]
+    assert results[1]["error"] == "OCR processing failed: boom"
+    assert results[3]["error"] == "OCR processing failed: boom"
+
+
+def test_cpu_mode_runs_one_image_per_job(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_GPU", False)
+    images = [np.full((2, 2), 1, np.uint8), np.full((2, 2), 2, np.uint8)]
+    
+    service, results = run_with_stub(extract_all(images))
+    
+    assert service.reader.batch_sizes == [1, 1]
+    assert [r["text"] for r in results] == ["text1", "text2"]
+
+
+def test_resolve_batch_skips_cancelled_futures():
+    async def run():
+        loop = asyncio.get_running_loop()
+        cancelled, pending = loop.create_future(), loop.create_future()
+        cancelled.cancel()
+        job = loop.create_future()
+        job.set_result([["first"], ["second"]])
+        OCRService._resolve_batch([cancelled, pending], job)
+        return cancelled, pending
+    
+    cancelled, pending = asyncio.run(run())
+    
+    assert cancelled.cancelled()
+    assert pending.result() == ["second"]
+
+
+def test_batcher_restarts_after_it_stops():
+    async def run(service):
+        service._ensure_batcher()
+        first_task = service._batcher_task
+        first_task.cancel()
+        await asyncio.gather(first_task, return_exceptions=True)
+        result = await service._extract_text(np.full((2, 2), 3, np.uint8))
+        return first_task, result
+    
+    service, (first_task, result) = run_with_stub(run)
+    
+    assert service._batcher_task is not first_task
+    assert result["text"] == "text3"
+
+
+def png_header(width, height):
+    """A PNG with just a valid IHDR, enough to declare its dimensions"""
+    ihdr = b"IHDR" + struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    chunk = struct.pack(">I", 13) + ihdr + struct.pack(">I", zlib.crc32(ihdr))
+    return b"\x89PNG\r\n\x1a\n" + chunk
+
+
+def test_prepare_image_rejects_decompression_bombs():
+    service = OCRService()
+    try:
+        with pytest.raises(InvalidImageError, match="Image too large"):
+            service._prepare_image(png_header(30000, 30000))
+    finally:
+        service._executor.shutdown()
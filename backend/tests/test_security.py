@@ -0,0 +1,24 @@
+import struct
+import zlib
+
+from src.core.security import read_image_dimensions
+
+
+def png_header(width, height):
+    ihdr = b"IHDR" + struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + ihdr + struct.pack(">I", zlib.crc32(ihdr))
+
+
+def test_reads_png_dimensions():
+    assert read_image_dimensions(png_header(640, 480)) == (640, 480)
+
+
+def test_reads_jpeg_dimensions_after_other_segments():
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, 1200, 1600, 1) + b"\x01\x11\x00"
+    assert read_image_dimensions(b"\xff\xd8" + app0 + sof0) == (1600, 1200)
+
+
+def test_unknown_or_truncated_headers_have_no_dimensions():
+    assert read_image_dimensions(b"GIF89a") is None
+    assert read_image_dimensions(b"\xff\xd8\xff\xe0") is None